@@ -1,13 +1,14 @@
 import os
 import uuid
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import StreamingResponse
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from datetime import datetime
-from typing import List
+from typing import List, Optional
 from dotenv import load_dotenv, find_dotenv
 import httpx
+import orjson
 from starlette.background import BackgroundTask
 from fastapi.responses import StreamingResponse
 
@@ -17,7 +18,9 @@ load_dotenv(find_dotenv())
 HTTPX_TIMEOUT = float(os.getenv("HTTPX_TIMEOUT", "60"))
 # Endpoint of the inference service
 INFERENCE_URL = os.getenv("INFERENCE_URL", "http://localhost:8001")
-app = FastAPI(title="Chat Backend")
+# Relay inference-service JSON bytes unchanged instead of parsing and re-validating them
+BACKEND_PASSTHROUGH = os.getenv("BACKEND_PASSTHROUGH", "1") not in ("0", "false", "False")
+app = FastAPI(title="Chat Backend", default_response_class=ORJSONResponse)
 
 class Chat(BaseModel):
     id: str
@@ -39,6 +42,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+def _json_response(resp: httpx.Response):
+    """Return the upstream body as-is in pass-through mode, otherwise parse it for response_model validation."""
+    if BACKEND_PASSTHROUGH:
+        return Response(content=resp.content, media_type="application/json")
+    return orjson.loads(resp.content)
+
 @app.get("/chats", response_model=List[Chat])
 async def get_chats():
     """Proxy to inference-service to list chats."""
@@ -46,7 +55,7 @@ async def get_chats():
         resp = await client.get(f"{INFERENCE_URL}/chats")
     if resp.status_code != 200:
         raise HTTPException(status_code=502, detail="Failed to fetch chats from inference service")
-    return resp.json()
+    return _json_response(resp)
 
 # Request model for creating a new chat
 class NewChatRequest(BaseModel):
@@ -62,7 +71,7 @@ async def new_chat(req: NewChatRequest):
         )
     if resp.status_code != 200:
         raise HTTPException(status_code=502, detail="Failed to create chat in inference service")
-    return resp.json()
+    return _json_response(resp)
     
 @app.get("/chats/{chat_id}", response_model=Chat)
 async def get_chat(chat_id: str):
@@ -73,16 +82,37 @@ async def get_chat(chat_id: str):
         raise HTTPException(status_code=404, detail="Chat not found in inference service")
     if resp.status_code != 200:
         raise HTTPException(status_code=502, detail="Failed to fetch chat metadata from inference service")
-    return resp.json()
+    return _json_response(resp)
 
 @app.get("/chats/{chat_id}/messages", response_model=List[Message])
 async def get_messages(chat_id: str):
     """Proxy to inference-service to retrieve chat history."""
-    async with httpx.AsyncClient(timeout=HTTPX_TIMEOUT) as client:
-        resp = await client.get(f"{INFERENCE_URL}/chats/{chat_id}/messages")
+    if not BACKEND_PASSTHROUGH:
+        async with httpx.AsyncClient(timeout=HTTPX_TIMEOUT) as client:
+            resp = await client.get(f"{INFERENCE_URL}/chats/{chat_id}/messages")
+        if resp.status_code != 200:
+            raise HTTPException(status_code=502, detail="Failed to fetch messages from inference service")
+        return orjson.loads(resp.content)
+
+    # Long histories: stream the upstream bytes through without buffering the whole body
+    client = httpx.AsyncClient(timeout=HTTPX_TIMEOUT)
+    stream_cm = client.stream("GET", f"{INFERENCE_URL}/chats/{chat_id}/messages")
+    resp = await stream_cm.__aenter__()
     if resp.status_code != 200:
+        await stream_cm.__aexit__(None, None, None)
+        await client.aclose()
         raise HTTPException(status_code=502, detail="Failed to fetch messages from inference service")
-    return resp.json()
+
+    async def proxy_iterator():
+        try:
+            async for chunk in resp.aiter_raw():
+                yield chunk
+        finally:
+            await stream_cm.__aexit__(None, None, None)
+            await client.aclose()
+
+    headers = {name: resp.headers[name] for name in ("content-encoding",) if name in resp.headers}
+    return StreamingResponse(proxy_iterator(), media_type="application/json", headers=headers)
 
 class AskRequest(BaseModel):
     message: str
@@ -99,75 +129,44 @@ async def ask(chat_id: str, req: AskRequest):
         raise HTTPException(status_code=404, detail="Chat not found in inference service")
     if resp.status_code != 200:
         raise HTTPException(status_code=502, detail="Failed to send message to inference service")
-    return resp.json()
+    return _json_response(resp)
 
-@app.get("/chats/{chat_id}/ask/stream")
-async def ask_stream(chat_id: str, message: str):
-    client = httpx.AsyncClient(timeout=HTTPX_TIMEOUT)
-    stream_cm = client.stream("GET", f"{INFERENCE_URL}/chats/{chat_id}/ask/stream", params={"message": message})
-    resp = await stream_cm.__aenter__()
-    if resp.status_code != 200:
-        await stream_cm.__aexit__(None, None, None)
-        await client.aclose()
-        raise HTTPException(status_code=502, detail="Failed to stream from inference service")
-    async def proxy_iterator():
-        try:
-            async for chunk in resp.aiter_bytes():
-                yield chunk
-        finally:
-            await stream_cm.__aexit__(None, None, None)
-            await client.aclose()
-    return StreamingResponse(
-        proxy_iterator(),
-        status_code=resp.status_code,
-        media_type="text/event-stream"
-    )
-    
-@app.get("/chats/{chat_id}/ask/stream-raw")
-async def ask_stream_raw(chat_id: str, message: str):
-    """Proxy raw chunked Markdown stream over GET from inference service."""
+# Request headers relayed to the inference service for negotiation and resumption
+STREAM_HEADERS = ("accept", "last-event-id", "idempotency-key")
+
+@app.api_route("/chats/{chat_id}/ask/stream", methods=["GET", "POST"])
+async def ask_stream(chat_id: str, request: Request, req: Optional[AskRequest] = None, message: Optional[str] = None):
+    """Proxy the answer stream (SSE or raw Markdown) from inference service."""
+    headers = {name: request.headers[name] for name in STREAM_HEADERS if name in request.headers}
     client = httpx.AsyncClient(timeout=HTTPX_TIMEOUT)
     stream_cm = client.stream(
-        "GET",
-        f"{INFERENCE_URL}/chats/{chat_id}/ask/stream-raw",
-        params={"message": message},
+        request.method,
+        f"{INFERENCE_URL}/chats/{chat_id}/ask/stream",
+        params={"message": message} if message is not None else None,
+        json={"message": req.message} if req else None,
+        headers=headers,
     )
     resp = await stream_cm.__aenter__()
     if resp.status_code != 200:
-        await stream_cm.__aexit__(None, None, None)
-        await client.aclose()
-        raise HTTPException(status_code=502, detail="Failed to stream raw from inference service")
-
-    async def proxy_raw_iter():
+        # Relay client errors (expired stream, idempotency conflict, missing message) as-is
+        detail = "Failed to stream from inference service"
+        status_code = 502
         try:
-            async for chunk in resp.aiter_bytes():
-                yield chunk
+            if 400 <= resp.status_code < 500:
+                status_code = resp.status_code
+                await resp.aread()
+                try:
+                    body = orjson.loads(resp.content)
+                except orjson.JSONDecodeError:
+                    body = None
+                if isinstance(body, dict) and body.get("detail"):
+                    detail = body["detail"]
         finally:
             await stream_cm.__aexit__(None, None, None)
             await client.aclose()
+        raise HTTPException(status_code=status_code, detail=detail)
 
-    return StreamingResponse(
-        proxy_raw_iter(),
-        status_code=resp.status_code,
-        media_type=resp.headers.get("content-type", "text/plain; charset=utf-8"),
-    )
-    
-@app.post("/chats/{chat_id}/ask/stream-raw-post")
-async def ask_stream_raw_post(chat_id: str, req: AskRequest):
-    """Proxy raw chunked Markdown stream via POST body."""
-    client = httpx.AsyncClient(timeout=HTTPX_TIMEOUT)
-    stream_cm = client.stream(
-        "POST",
-        f"{INFERENCE_URL}/chats/{chat_id}/ask/stream-raw-post",
-        json={"message": req.message},
-    )
-    resp = await stream_cm.__aenter__()
-    if resp.status_code != 200:
-        await stream_cm.__aexit__(None, None, None)
-        await client.aclose()
-        raise HTTPException(status_code=502, detail="Failed to POST raw stream from inference service")
-
-    async def proxy_raw_post_iter():
+    async def proxy_iterator():
         try:
             async for chunk in resp.aiter_bytes():
                 yield chunk
@@ -176,9 +175,10 @@ async def ask_stream_raw_post(chat_id: str, req: AskRequest):
             await client.aclose()
 
     return StreamingResponse(
-        proxy_raw_post_iter(),
+        proxy_iterator(),
         status_code=resp.status_code,
-        media_type=resp.headers.get("content-type", "text/plain; charset=utf-8"),
+        media_type=resp.headers.get("content-type", "text/event-stream"),
+        headers={"X-Stream-Id": resp.headers.get("x-stream-id", ""), "Cache-Control": "no-cache"},
     )
 
 if __name__ == "__main__":
@@ -0,0 +1,81 @@
+"""Microbenchmark: reading a long chat transcript through inference-service and backend.
+
+Compares the legacy path (pydantic validation in both services plus JSON round-trips)
+with the compact stored form, orjson responses and backend pass-through.
+
+    python bench_transcripts.py [--messages 10000] [--repeat 5]
+"""
+import argparse
+import json
+import time
+import uuid
+from typing import List
+
+import orjson
+from pydantic import BaseModel
+
+from transcripts import StoredMessage, decode_messages, encode_messages
+
+
+class Message(BaseModel):
+    # Mirrors memory.Message / backend Message without pulling in mem0
+    id: str
+    sender: str
+    content: str
+
+
+def make_chat(n: int) -> List[StoredMessage]:
+    text = "Here is some **Markdown** with a list:\n- item one\n- item two\n```python\nprint('hi')\n```\n"
+    return [
+        StoredMessage(str(uuid.uuid4()), "user" if i % 2 == 0 else "ai", f"{i}: {text}")
+        for i in range(n)
+    ]
+
+
+def legacy_read(stored: list) -> bytes:
+    # inference-service: get_chat() validation + response_model serialization
+    messages = [Message(**m) for m in stored]
+    body = json.dumps([m.dict() for m in messages]).encode()
+    # backend: resp.json() + response_model validation + serialization
+    proxied = [Message(**m) for m in json.loads(body)]
+    return json.dumps([m.dict() for m in proxied]).encode()
+
+
+def compact_read(stored) -> bytes:
+    # inference-service: decode compact rows + orjson; backend relays the bytes unchanged
+    return orjson.dumps(decode_messages(stored))
+
+
+def bench(fn, arg, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(arg)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    chat = make_chat(args.messages)
+    legacy_stored = [Message(id=m.id, sender=m.sender, content=m.content).dict() for m in chat]
+    compact_stored = encode_messages(chat)
+    assert orjson.loads(compact_read(compact_stored)) == json.loads(legacy_read(legacy_stored))
+
+    legacy_size = len(orjson.dumps(legacy_stored))
+    compact_size = len(orjson.dumps(compact_stored))
+    legacy_time = bench(legacy_read, legacy_stored, args.repeat)
+    compact_time = bench(compact_read, compact_stored, args.repeat)
+
+    print(f"{args.messages} messages, best of {args.repeat}")
+    print(f"  stored payload: legacy {legacy_size / 1024:.0f} KiB, compact {compact_size / 1024:.0f} KiB")
+    print(f"  read path:      legacy {legacy_time * 1000:.1f} ms, compact {compact_time * 1000:.1f} ms "
+          f"({legacy_time / compact_time:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,24 @@
 import os
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Header
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import Any
-from typing import List
+from typing import List, Optional
 
 from dotenv import load_dotenv, find_dotenv
 # Load .env from project root (searches parent dirs)
 load_dotenv(find_dotenv())
 
 from memory import Memory, Chat, Message, OPENAI_LLM_MODEL, SYSTEM_PROMPT
-from fastapi.responses import StreamingResponse
+from streams import StreamBuffer, StreamRegistry, parse_event_id
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 import openai
 import orjson
 async_openai_client = openai.AsyncOpenAI()
 
 class SSEEvent(BaseModel):
+    id: str = None
     text: str = ""
     done: bool = False
     error: str = None
@@ -27,12 +30,13 @@ class SSEEvent(BaseModel):
             base["done"] = True
         if self.error:
             base["error"] = self.error
-        return f"data: {orjson.dumps(base).decode()}\n\n"
+        prefix = f"id: {self.id}\n" if self.id else ""
+        return f"{prefix}data: {orjson.dumps(base).decode()}\n\n"
 
 # Base URL and port for this inference service
 INFERENCE_PORT = int(os.getenv("INFERENCE_PORT", 8001))
 
-app = FastAPI(title="Inference Service")
+app = FastAPI(title="Inference Service", default_response_class=ORJSONResponse)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -43,6 +47,8 @@ app.add_middleware(
 
 # Initialize memory (mem0ai + OpenAI) manager
 mem = Memory('test_user')
+# Replay buffers for in-flight and recently finished answer streams
+streams = StreamRegistry()
 
 class AskRequest(BaseModel):
     message: str
@@ -61,8 +67,8 @@ async def create_chat() -> Any:
 @app.get("/chats/{chat_id}/messages", response_model=List[Message])
 async def get_messages(chat_id: str):
     """Return message history for a given chat."""
-    # Validate chat exists
-    return mem.get_chat(chat_id)
+    # Serialize the stored messages directly with orjson, skipping per-message response_model validation
+    return ORJSONResponse(mem.get_chat(chat_id))
     
 @app.get("/chats/{chat_id}", response_model=Chat)
 async def get_chat_metadata(chat_id: str):
@@ -83,8 +89,8 @@ async def ask(chat_id: str, req: AskRequest, background_tasks: BackgroundTasks):
 
     llm_msgs = [{"role": "system", "content": SYSTEM_PROMPT}]
     for m in history_msgs:
-        role = "user" if m.get("sender") == "user" else "assistant"
-        llm_msgs.append({"role": role, "content": m.get("content", "")})
+        role = "user" if m.sender == "user" else "assistant"
+        llm_msgs.append({"role": role, "content": m.content})
     llm_msgs.append({"role": "user", "content": req.message})
 
     # ask LLM for response
@@ -114,60 +120,80 @@ async def ask(chat_id: str, req: AskRequest, background_tasks: BackgroundTasks):
     # 4. Immediately return the AI message
     return ai_message_to_return
 
-@app.get("/chats/{chat_id}/ask/stream")
-async def ask_stream(chat_id: str, message: str, background_tasks: BackgroundTasks):
-    """Stream AI response as Server-Sent Events, prompt via query param."""
-    # Build messages for OpenAI
-    history = mem.get_chat(chat_id)
-    chat_messages = [{"role": "system", "content": SYSTEM_PROMPT}]
-    for msg in history:
-        role = "user" if msg.sender == "user" else "assistant"
-        chat_messages.append({"role": role, "content": msg.content})
-    chat_messages.append({"role": "user", "content": message})
+def _wants_event_stream(accept: str) -> bool:
+    """SSE unless the client explicitly asks for plain text only."""
+    return "text/event-stream" in accept or "text/plain" not in accept
+
+@app.api_route("/chats/{chat_id}/ask/stream", methods=["GET", "POST"])
+async def ask_stream(
+    chat_id: str,
+    req: Optional[AskRequest] = None,
+    message: Optional[str] = None,
+    accept: str = Header("text/event-stream"),
+    last_event_id: Optional[str] = Header(None),
+    idempotency_key: Optional[str] = Header(None),
+):
+    """Stream AI response; prompt via POST body or `message` query param.
+
+    Responds with Server-Sent Events (with `<stream_id>:<index>` event ids) or,
+    for `Accept: text/plain`, raw chunked Markdown. SSE clients reconnecting with
+    `Last-Event-ID` resume from the replay buffer. Raw clients cannot see event
+    boundaries, so they only support reattaching with the same `Idempotency-Key`,
+    which replays the answer from the start.
+    """
+    event_stream = _wants_event_stream(accept)
+    if last_event_id and not event_stream:
+        raise HTTPException(status_code=400, detail="Last-Event-ID is only supported for text/event-stream; use Idempotency-Key")
+    prompt = req.message if req else message
+    stream_id, start = parse_event_id(last_event_id)
+    if stream_id:
+        # Resuming never regenerates: a lost buffer would stream a second answer onto the first
+        buf = streams.get(stream_id)
+        if buf is None or buf.chat_id != chat_id:
+            raise HTTPException(status_code=410, detail="Stream expired or unknown; reload the chat history")
+    else:
+        start = 0
+        key = f"{chat_id}:{idempotency_key}" if idempotency_key else None
+        buf = streams.find(key)
+        if buf is not None and prompt and buf.prompt != prompt:
+            raise HTTPException(status_code=409, detail="Idempotency-Key was already used with a different message")
+        if buf is None:
+            if not prompt:
+                raise HTTPException(status_code=422, detail="Message is required")
+            buf = streams.start(chat_id, prompt, _answer_producer(chat_id, prompt), key=key)
+
+    if event_stream:
+        async def sse_generator():
+            index = start
+            async for index, delta in buf.read(start):
+                yield SSEEvent(id=f"{buf.id}:{index}", text=delta).serialize().encode("utf-8")
+                index += 1
+            if buf.error:
+                yield SSEEvent(id=f"{buf.id}:{index}", error=buf.error).serialize().encode("utf-8")
+            else:
+                yield SSEEvent(id=f"{buf.id}:{index}", done=True).serialize().encode("utf-8")
+
+        return StreamingResponse(
+            sse_generator(),
+            media_type="text/event-stream",
+            headers={"X-Stream-Id": buf.id, "Cache-Control": "no-cache"},
+        )
 
-    def event_generator():
-        ai_text = ""
-        print("DEBUG: [Inference Generator] Started")
-        try:
-            for chunk_index, chunk in enumerate(openai.chat.completions.create(
-                model=OPENAI_LLM_MODEL,
-                messages=chat_messages,
-                stream=True,
-            )):
-                delta = (
-                    chunk.choices[0].delta.content
-                    if chunk.choices and chunk.choices[0].delta else ""
-                )
-                if delta:
-                    ai_text += delta
-                    event = SSEEvent(text=delta)
-                    yield event.serialize().encode("utf-8")
-            
-            yield SSEEvent(done=True).serialize().encode("utf-8")
-
-            # Save AI message
-            try:
-                background_tasks.add_task(
-                    mem.update_chat, # The coroutine function to run in background
-                    chat_id,         # First argument to update_chat
-                    message,         # Second argument
-                    ai_text          # Third argument
-                )
-                # mem.update_chat(chat_id, message, ai_text)
-            except Exception as mem_err:
-                print(f"ERROR: [Inference Generator] Failed to update memory: {mem_err}")
-            
-        except Exception as outer_err:
-            print(f"ERROR: [Inference Generator] Outer exception: {outer_err}")
-            yield SSEEvent(error="Generator failure").serialize().encode("utf-8")
-        finally:
-            print("DEBUG: [Inference Generator] Finished")
-
-    return StreamingResponse(event_generator(), media_type="text/event-stream")
-
-@app.get("/chats/{chat_id}/ask/stream-raw")
-async def ask_stream_raw(chat_id: str, message: str, background_tasks: BackgroundTasks):
-    """Raw chunked Markdown stream over GET?message=..."""
+    async def raw_generator():
+        async for _, delta in buf.read(start):
+            yield delta
+        if buf.error:
+            # Abort the chunked response so a truncated answer is not mistaken for a complete one
+            raise RuntimeError(f"Stream {buf.id} failed: {buf.error}")
+
+    return StreamingResponse(
+        raw_generator(),
+        media_type="text/plain; charset=utf-8",
+        headers={"X-Stream-Id": buf.id},
+    )
+
+def _answer_producer(chat_id: str, message: str):
+    """Build the LLM call for a chat turn; chunks go to the replay buffer and the turn is saved once done."""
     history = mem.get_chat(chat_id)
     chat_messages = [{"role": "system", "content": SYSTEM_PROMPT}]
     for msg in history:
@@ -175,30 +201,27 @@ async def ask_stream_raw(chat_id: str, message: str, background_tasks: Backgroun
         chat_messages.append({"role": role, "content": msg.content})
     chat_messages.append({"role": "user", "content": message})
 
-    async def raw_generator():
-        ai_text = ""
+    async def produce(buf: StreamBuffer):
         async for chunk in await async_openai_client.chat.completions.create(
             model=OPENAI_LLM_MODEL,
             messages=chat_messages,
             stream=True,
         ):
-            delta = chunk.choices[0].delta.content or ''
-            ai_text += delta
-            yield delta
-        background_tasks.add_task(
-            mem.update_chat, # The coroutine function to run in background
-            chat_id,         # First argument to update_chat
-            message,         # Second argument
-            ai_text          # Third argument
-        )
-
-    return StreamingResponse(raw_generator(), media_type="text/plain; charset=utf-8")
+            delta = (
+                chunk.choices[0].delta.content
+                if chunk.choices and chunk.choices[0].delta else ""
+            )
+            if delta:
+                await buf.append(delta)
+        await buf.finish()
+
+        # Save AI message
+        try:
+            await run_in_threadpool(mem.update_chat, chat_id, message, buf.text)
+        except Exception as mem_err:
+            print(f"ERROR: [Stream {buf.id}] Failed to update memory: {mem_err}")
 
-@app.post("/chats/{chat_id}/ask/stream-raw-post")
-async def ask_stream_raw_post(chat_id: str, req: AskRequest, background_tasks: BackgroundTasks):  # reuse AskRequest
-    """Raw chunked Markdown stream over POST body."""
-    # Delegate to the GET raw stream endpoint under the hood
-    return await ask_stream_raw(chat_id, req.message, background_tasks)
+    return produce
 
 if __name__ == "__main__":
     import uvicorn
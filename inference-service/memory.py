@@ -1,9 +1,11 @@
 import os
 from pydantic import BaseModel # type: ignore
 from datetime import datetime, timezone
-from typing import Dict, List, Optional
+from typing import List, Optional
 import uuid
 
+from transcripts import StoredMessage, append_messages, decode_messages
+
 from dotenv import load_dotenv # type: ignore
 load_dotenv()
 
@@ -139,7 +141,7 @@ class Memory:
     def get_chat(self, chat_id: Optional[str] = None):
         """Retrieve list of chats or messages for a specific chat.
         If chat_id is None, return the in-memory list of Chat objects.
-        Otherwise, return the stored Message list for that chat_id (empty if none)."""
+        Otherwise, return the stored StoredMessage list for that chat_id (empty if none)."""
         # list chats
         if chat_id is None:
             return []
@@ -148,17 +150,9 @@ class Memory:
         items = result.get("results", [])
         if not items:
             return []
-        # messages stored in metadata under 'messages'
+        # messages stored in metadata under 'messages' (compact, possibly compressed)
         meta = items[0].get("metadata", {}) or {}
-        stored = meta.get("messages", [])
-        # reconstruct Message objects
-        messages: List[Message] = []
-        for m in stored:
-            try:
-                messages.append(Message(**m))
-            except Exception:
-                continue
-        return messages
+        return decode_messages(meta.get("messages"))
 
     def get_chats(self):
         result = self._get_all()
@@ -186,8 +180,8 @@ class Memory:
         print(f"================= {chat}")
         return chat
 
-    def update_chat(self, chat_id: str, user_ask: str, ai_response: str) -> str:
-        """Append a message record to the memory store for the given chat and return its mem0 id."""
+    def update_chat(self, chat_id: str, user_ask: str, ai_response: str) -> StoredMessage:
+        """Append the user/AI turn to the stored transcript for the given chat and return the AI message."""
         entries = self._search(chat_id, user_id=chat_id, limit=1, filters={}).get("results", [])
         is_new = not entries
         # infer title on first message
@@ -198,17 +192,18 @@ class Memory:
                 if chat.id == chat_id:
                     chat.title = title
                     break
-            history_msgs: List[Dict] = []
+            history_msgs = None
         else:
             meta = entries[0].get("metadata", {}) or {}
             title = meta.get("title", "")
-            history_msgs = meta.get("messages", [])
+            # keep the stored rows as-is; decoding would drop any malformed ones
+            history_msgs = meta.get("messages")
         
         # build new message objects with unique ids
-        user_msg = Message(id=str(uuid.uuid4()), sender="user", content=user_ask)
-        ai_msg   = Message(id=str(uuid.uuid4()), sender="ai",   content=ai_response)
-        # assemble updated message list
-        new_msgs = history_msgs + [user_msg.dict(), ai_msg.dict()]
+        user_msg = StoredMessage(id=str(uuid.uuid4()), sender="user", content=user_ask)
+        ai_msg   = StoredMessage(id=str(uuid.uuid4()), sender="ai",   content=ai_response)
+        # assemble updated message list in its compact stored form
+        new_msgs = append_messages(history_msgs, [user_msg, ai_msg])
 
         if not is_new:
             old_id = entries[0].get("id")
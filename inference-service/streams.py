@@ -0,0 +1,115 @@
+import asyncio
+import os
+import uuid
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+# Seconds a finished stream stays available for replay / reattachment
+STREAM_REPLAY_TTL: float = float(os.getenv("STREAM_REPLAY_TTL", "60"))
+
+
+class StreamBuffer:
+    """Append-only replay buffer holding the generated chunks of one ask request.
+
+    Readers never talk to the LLM directly: the generation runs in its own task
+    and every connected (or reconnecting) client reads from this buffer.
+    """
+
+    def __init__(self, stream_id: str, chat_id: str, prompt: str):
+        self.id = stream_id
+        self.chat_id = chat_id
+        self.prompt = prompt
+        self.chunks: List[str] = []
+        self.done = False
+        self.error: Optional[str] = None
+        self.task: Optional[asyncio.Task] = None
+        self._changed = asyncio.Condition()
+
+    @property
+    def text(self) -> str:
+        return "".join(self.chunks)
+
+    async def append(self, chunk: str):
+        async with self._changed:
+            self.chunks.append(chunk)
+            self._changed.notify_all()
+
+    async def finish(self, error: Optional[str] = None):
+        async with self._changed:
+            self.done = True
+            self.error = error
+            self._changed.notify_all()
+
+    async def read(self, start: int = 0) -> AsyncIterator[Tuple[int, str]]:
+        """Yield (index, chunk) pairs from `start`, waiting for new chunks until the stream finishes."""
+        index = start
+        while True:
+            async with self._changed:
+                await self._changed.wait_for(lambda: index < len(self.chunks) or self.done)
+                pending = self.chunks[index:]
+                finished = self.done
+            for chunk in pending:
+                yield index, chunk
+                index += 1
+            if finished:
+                return
+
+
+class StreamRegistry:
+    """In-process registry of live and recently finished streams."""
+
+    def __init__(self, ttl: float = STREAM_REPLAY_TTL):
+        self.ttl = ttl
+        self._streams: Dict[str, StreamBuffer] = {}
+        # idempotency key -> stream id
+        self._keys: Dict[str, str] = {}
+
+    def get(self, stream_id: str) -> Optional[StreamBuffer]:
+        return self._streams.get(stream_id)
+
+    def find(self, key: Optional[str]) -> Optional[StreamBuffer]:
+        """Return the stream started for an idempotency key, if still available."""
+        if not key:
+            return None
+        stream_id = self._keys.get(key)
+        return self._streams.get(stream_id) if stream_id else None
+
+    def start(
+        self,
+        chat_id: str,
+        prompt: str,
+        produce: Callable[[StreamBuffer], Awaitable[None]],
+        key: Optional[str] = None,
+    ) -> StreamBuffer:
+        """Run `produce` for a chat turn in a background task detached from any client connection."""
+        buf = StreamBuffer(str(uuid.uuid4()), chat_id, prompt)
+        self._streams[buf.id] = buf
+        if key:
+            self._keys[key] = buf.id
+        buf.task = asyncio.create_task(self._run(buf, produce, key))
+        return buf
+
+    async def _run(self, buf: StreamBuffer, produce: Callable[[StreamBuffer], Awaitable[None]], key: Optional[str]):
+        try:
+            await produce(buf)
+        except Exception as err:
+            print(f"ERROR: [Stream {buf.id}] Generation failed: {err}")
+        finally:
+            if not buf.done:
+                await buf.finish(error="Generator failure")
+            asyncio.get_running_loop().call_later(self.ttl, self._expire, buf.id, key)
+
+    def _expire(self, stream_id: str, key: Optional[str]):
+        self._streams.pop(stream_id, None)
+        if key and self._keys.get(key) == stream_id:
+            del self._keys[key]
+
+
+def parse_event_id(event_id: Optional[str]) -> Tuple[Optional[str], int]:
+    """Split a `<stream_id>:<index>` event id into the stream id and the next chunk index to send."""
+    if not event_id or ":" not in event_id:
+        return None, 0
+    stream_id, _, index = event_id.rpartition(":")
+    try:
+        return stream_id, int(index) + 1
+    except ValueError:
+        return None, 0
@@ -0,0 +1,79 @@
+import base64
+import os
+import zlib
+from dataclasses import dataclass
+from typing import Any, List
+
+import orjson
+
+# Store chat transcripts zlib-compressed (set to 0 to keep plain JSON arrays in Qdrant)
+TRANSCRIPT_COMPRESSION: bool = os.getenv("TRANSCRIPT_COMPRESSION", "1") not in ("0", "false", "False")
+# Prefix marking a compressed transcript blob (versioned for future formats)
+_COMPRESSED_PREFIX = "z1:"
+
+
+@dataclass(slots=True)
+class StoredMessage:
+    """Lightweight chat message used on the storage and response hot paths.
+
+    Serialized natively by orjson, so no pydantic validation happens per message.
+    """
+    id: str
+    sender: str  # 'user' or 'ai'
+    content: str
+
+
+def _load_rows(stored: Any) -> list:
+    """Return the raw stored rows without validating them.
+
+    Raises ValueError for unrecognized formats rather than returning an empty
+    history, which `Memory.update_chat` would then write back over the chat.
+    """
+    if stored is None:
+        return []
+    if isinstance(stored, str):
+        if not stored.startswith(_COMPRESSED_PREFIX):
+            raise ValueError(f"Unknown transcript format: {stored[:8]!r}")
+        stored = orjson.loads(zlib.decompress(base64.b64decode(stored[len(_COMPRESSED_PREFIX):])))
+    if not isinstance(stored, list):
+        raise ValueError(f"Unknown transcript format: {type(stored).__name__}")
+    return stored
+
+
+def _dump_rows(rows: list) -> Any:
+    if not TRANSCRIPT_COMPRESSION:
+        return rows
+    packed = zlib.compress(orjson.dumps(rows))
+    return _COMPRESSED_PREFIX + base64.b64encode(packed).decode("ascii")
+
+
+def encode_messages(messages: List[StoredMessage]) -> Any:
+    """Pack messages as compact `[id, sender, content]` rows, optionally compressed into a string."""
+    return _dump_rows([(m.id, m.sender, m.content) for m in messages])
+
+
+def append_messages(stored: Any, messages: List[StoredMessage]) -> Any:
+    """Append messages to a stored transcript, carrying existing rows through unchanged.
+
+    Rows are not decoded here, so entries `decode_messages` would skip are never lost on write.
+    """
+    rows = list(_load_rows(stored))
+    rows.extend((m.id, m.sender, m.content) for m in messages)
+    return _dump_rows(rows)
+
+
+def decode_messages(stored: Any) -> List[StoredMessage]:
+    """Inverse of `encode_messages`; also reads legacy lists of `Message.dict()` entries.
+
+    Read-only path: malformed rows are skipped (they stay in storage, see `append_messages`).
+    """
+    messages: List[StoredMessage] = []
+    for m in _load_rows(stored):
+        try:
+            if isinstance(m, dict):
+                messages.append(StoredMessage(m["id"], m["sender"], m["content"]))
+            else:
+                messages.append(StoredMessage(*m))
+        except Exception:
+            continue
+    return messages
@@ -168,9 +168,10 @@ function App() {
         // const data = event.data;
         const data = JSON.parse(event.data);
         console.log(data)
-        if (data.done) {
+        if (data.done || data.error) {
           setIsSendingMessage(false);
           es.close();
+          if (data.error) console.error('Streaming error', data.error);
           // After streaming completes, refresh chat metadata
           scheduleRefreshChatMetadata();
         } else {
@@ -183,9 +184,11 @@ function App() {
         }
       };
       es.onerror = (err) => {
+        // Transient drops are retried by the browser with Last-Event-ID and resume
+        // from the server's replay buffer; only give up once the source is closed.
+        if (es.readyState !== EventSource.CLOSED) return;
         console.error('Streaming error', err);
         setIsSendingMessage(false);
-        es.close();
       };
     },
     [activeChatId]
@@ -66,6 +66,8 @@ export const askChat = async (
 /**
  * Stream AI responses via Server-Sent Events (SSE) over GET with query param.
  * Returns an EventSource you can attach onmessage and onerror handlers to.
+ * Keep it open on transient errors: the browser reconnects with Last-Event-ID
+ * and the answer resumes from the server's replay buffer.
  */
 export const askChatStream = (
   chatId: string,
@@ -87,12 +89,12 @@ export const askChatRawStream = async (
   messageContent: string
 ): Promise<ReadableStream<Uint8Array> | null> => {
   if (!chatId) throw new Error('No active chat selected');
-  const url = `${API_BASE}/chats/${chatId}/ask/stream-raw?message=${encodeURIComponent(
+  const url = `${API_BASE}/chats/${chatId}/ask/stream?message=${encodeURIComponent(
     messageContent
   )}`;
   const res = await fetch(url, {
     method: 'GET',
-    headers: { 'Accept': 'text/plain' }, // Indicate that we expect plain text
+    headers: { 'Accept': 'text/plain' }, // Negotiate raw Markdown instead of SSE
   });
 
   if (!res.ok) {
@@ -104,18 +106,22 @@ export const askChatRawStream = async (
 /**
  * Stream raw AI responses over POST with JSON body.
  * Returns a ReadableStream from a fetch response.
+ * @param idempotencyKey Optional key; retrying with the same key attaches to the
+ *   in-flight answer instead of starting a new generation
  */
 export const askChatRawStreamPost = async (
   chatId: string,
-  messageContent: string
+  messageContent: string,
+  idempotencyKey?: string
 ): Promise<ReadableStream<Uint8Array> | null> => {
   if (!chatId) throw new Error('No active chat selected');
-  const url = `${API_BASE}/chats/${chatId}/ask/stream-raw-post`;
+  const url = `${API_BASE}/chats/${chatId}/ask/stream`;
   const res = await fetch(url, {
     method: 'POST',
     headers: {
       'Content-Type': 'application/json',
-      'Accept': 'text/plain', // Indicate that we expect plain text
+      'Accept': 'text/plain', // Negotiate raw Markdown instead of SSE
+      ...(idempotencyKey ? { 'Idempotency-Key': idempotencyKey } : {}),
     },
     body: JSON.stringify({ message: messageContent }),
   });